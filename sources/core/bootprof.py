@@ -0,0 +1,159 @@
+import sys
+import json
+import statistics
+import subprocess
+from pathlib import Path
+from utils.load import load_config
+from utils.arch import host_arch
+
+# User-, Mount-, PID-, Net-, UTS- und IPC-Namespace: rcS darf proc/sysfs/tmpfs
+# mounten und Interfaces anfassen, ohne das Host-System zu verändern
+SANDBOX = ["unshare", "--user", "--map-root-user", "--mount", "--pid", "--fork", "--net", "--uts", "--ipc"]
+
+
+# Läuft im Namespace, aber noch außerhalb des chroot ($0 = RootFS, $1 = Befehl im chroot):
+# private tmpfs über <rootfs>/dev und <rootfs>/run, damit mdev, Logs & Co. nie das
+# Build-RootFS verändern. /dev/null wird vom Host durchgereicht (devtmpfs ist im
+# User-Namespace nicht mountbar).
+SANDBOX_SETUP = (
+    'mount -t tmpfs -o mode=0755 tmpfs "$0/dev" && '
+    'mount -t tmpfs -o mode=0755 tmpfs "$0/run" && '
+    ': > "$0/dev/null" && mount --bind /dev/null "$0/dev/null" && '
+    'exec chroot "$0" /bin/sh -c "$1"'
+)
+
+
+def run_boot_script(rootfs_dir: Path, script: str, log: str, timeout: int) -> str:
+    """Startet script im RootFS innerhalb der Namespace-Sandbox und liefert das Boot-Ringlog"""
+    # stdin=DEVNULL: das abschließende 'exec /bin/sh' endet sofort. Die Ausgabe des
+    # Skripts geht nach stderr, stdout enthält nur das Log. Es wird noch im selben
+    # Mount-Namespace gelesen, bevor /run (tmpfs) verschwindet.
+    wrapper = f"{script} 1>&2; cat {log}"
+    cmd = SANDBOX + ["/bin/sh", "-c", SANDBOX_SETUP, str(rootfs_dir.resolve()), wrapper]
+    try:
+        result = subprocess.run(cmd, stdin=subprocess.DEVNULL, capture_output=True, text=True, timeout=timeout)
+    except FileNotFoundError:
+        print(f"Fehler: Befehl '{cmd[0]}' nicht gefunden.")
+        sys.exit(1)
+    except subprocess.TimeoutExpired:
+        print(f"Fehler: {script} hat das Zeitlimit von {timeout}s überschritten.")
+        sys.exit(1)
+    if result.returncode != 0 or not result.stdout.strip():
+        print(f"Fehler bei '{' '.join(cmd)}': Exit Code {result.returncode}")
+        if result.stderr:
+            print(result.stderr.strip())
+        sys.exit(result.returncode or 1)
+    return result.stdout
+
+
+def parse_boot_log(text: str) -> dict:
+    """Wandelt Ringlog-Zeilen '<skript> <seq> <zeit> <schritt>' in {'skript:schritt': ms} um"""
+    marks = {}
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) != 4:
+            continue
+        script, seq, stamp, step = parts
+        try:
+            marks.setdefault(script, []).append((int(seq), float(stamp), step))
+        except ValueError:
+            print(f"[WARN] Ungültige Zeile im Boot-Log (date ohne %N Unterstützung?): {line}")
+
+    durations = {}
+    for script, entries in marks.items():
+        entries.sort()
+        for (_, start, step), (_, end, _) in zip(entries, entries[1:]):
+            durations[f"{script}:{step}"] = (end - start) * 1000
+        if len(entries) > 1:
+            durations[f"{script}:total"] = (entries[-1][1] - entries[0][1]) * 1000
+    return durations
+
+
+def compare_baseline(results: dict, baseline: dict, tolerance: float, min_delta_ms: float) -> list:
+    """Liefert alle Schritte, die langsamer als Baseline * (1 + tolerance) und min_delta_ms sind"""
+    regressions = []
+    for key, ms in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if ms > base * (1 + tolerance) and ms - base > min_delta_ms:
+            regressions.append((key, base, ms))
+    return regressions
+
+
+def missing_steps(results: dict, baseline: dict) -> list:
+    """Liefert alle Schritte der Baseline, die in den Messergebnissen fehlen"""
+    return [key for key in baseline if key not in results]
+
+
+def print_report(results: dict, spread: dict, baseline: dict, regressions: list):
+    regressed = {key for key, _, _ in regressions}
+    print(f"\n{'Schritt':<28} {'Median ms':>10} {'Min ms':>8} {'Max ms':>8} {'Baseline':>10} {'Delta':>8}")
+    for key, ms in results.items():
+        base = baseline.get(key)
+        lo, hi = spread[key]
+        base_str = f"{base:10.2f}" if base is not None else f"{'-':>10}"
+        delta_str = f"{(ms - base) / base * 100:+7.1f}%" if base else f"{'-':>8}"
+        flag = "  ⚠ REGRESSION" if key in regressed else ""
+        print(f"{key:<28} {ms:10.2f} {lo:8.2f} {hi:8.2f} {base_str} {delta_str}{flag}")
+
+
+def profile_boot(rootfs_dir: Path, args) -> bool:
+    """Misst die Boot-Schritte von init/rcS im RootFS und vergleicht mit der gespeicherten Baseline"""
+
+    # Load Config
+    config = load_config(Path("configs") / args.boot_config)
+    arch = args.arch or load_config(Path("configs") / args.config).get("cross_compile", {}).get("arch", "arm64")
+    native = host_arch()
+    if arch != native:
+        print(f"[WARN] Boot-Profiling nur für native Builds ({native}), Ziel ist {arch}; übersprungen.")
+        return True
+
+    runs = config.get("runs", 5)
+    log = config.get("log", "/run/bootprof.log")
+    timeout = config.get("timeout", 60)
+    baseline_path = Path(config.get("baseline", "configs/bootprof_baseline_{arch}.json").format(arch=arch))
+
+    # Messen: jeder Lauf liefert {'skript:schritt': ms}, pro Schritt wird der Median genommen
+    samples = {}
+    for script in config.get("scripts", ["/init", "/etc/init.d/rcS"]):
+        for i in range(runs):
+            print(f"Console > Boot-Profiling {script} ({i + 1}/{runs}) ...")
+            for key, ms in parse_boot_log(run_boot_script(rootfs_dir, script, log, timeout)).items():
+                samples.setdefault(key, []).append(ms)
+
+    results = {key: statistics.median(values) for key, values in samples.items()}
+    spread = {key: (min(values), max(values)) for key, values in samples.items()}
+    if not results:
+        print("Fehler: Kein Boot-Schritt im Log gefunden (instrumentiertes init/rcS? date mit %N?).")
+        return False
+
+    baseline = {}
+    if baseline_path.exists():
+        baseline = load_config(baseline_path).get("steps", {})
+    else:
+        print(f"[INFO] Keine Baseline unter {baseline_path} gefunden.")
+
+    regressions = compare_baseline(results, baseline, config.get("tolerance", 0.25), config.get("min_delta_ms", 2.0))
+    missing = missing_steps(results, baseline)
+    print_report(results, spread, baseline, regressions)
+    for key in missing:
+        print(f"[WARN] Schritt {key} aus der Baseline wurde nicht gemessen.")
+
+    if args.update_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps({"arch": arch, "runs": runs, "steps": results}, indent=2) + "\n")
+        print(f"[INFO] Baseline gespeichert: {baseline_path}")
+        return True
+
+    if not baseline:
+        print("\nℹ Keine Baseline zum Vergleich; mit --update-baseline speichern.")
+        return True
+    if regressions or missing:
+        if regressions:
+            print(f"\n❌ {len(regressions)} Boot-Schritt(e) langsamer als die Baseline.")
+        if missing:
+            print(f"\n❌ {len(missing)} Boot-Schritt(e) der Baseline fehlen in der Messung.")
+        return False
+    print("\n✅ Boot-Zeiten innerhalb der Baseline.")
+    return True
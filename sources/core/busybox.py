@@ -2,6 +2,7 @@ from pathlib import Path
 from utils.load import load_config
 from utils.download import download_file, extract_tarball
 from utils.execute import run_command_live, run_command
+from core.toolchain import select_toolchain
 import os
 import multiprocessing
 
@@ -10,6 +11,11 @@ DEFAULT_PATCH = {
     "CONFIG_STATIC": "y",       # Optional: statisches Binary
 }
 
+# Boot-Profiling: _bp_mark braucht 'date +%s.%N' (Nanosekunden)
+BOOTPROF_PATCH = {
+    "CONFIG_FEATURE_DATE_NANO": "y",
+}
+
 
 def set_config_option(cfg_file: Path, key: str, value: str):
     """Setzt oder ersetzt eine Option in der .config"""
@@ -73,11 +79,13 @@ def build_busybox(work_dir: Path, downloads_dir: Path, rootfs_dir: Path, args):
     
     # Adjust Architecture
     if args.arch:
+        if args.arch != cross_compile.get("arch"):
+            # Andere Zielarchitektur: das konfigurierte Compiler-Präfix passt nicht mehr
+            cross_compile.pop("compiler_prefix", None)
         cross_compile["arch"] = args.arch
-        if args.arch == "x86_64":
-            cross_compile["compiler_prefix"] = ""
-        elif args.arch == "arm64":
-            cross_compile["compiler_prefix"] = "aarch64-linux-gnu-"
+
+    # Toolchain proben (gecacht) und Flag-Profil anwenden, bevor heruntergeladen wird
+    toolchain = select_toolchain(cross_compile.get("arch", "arm64"), cross_compile, args)
 
     # Paths
     downloads_dir.mkdir(parents=True, exist_ok=True)
@@ -100,27 +108,28 @@ def build_busybox(work_dir: Path, downloads_dir: Path, rootfs_dir: Path, args):
     env = os.environ.copy()
     arch = cross_compile.get("arch", "arm64")
     env["ARCH"] = arch
-    if arch != "x86_64":
-        env["CROSS_COMPILE"] = cross_compile.get("compiler_prefix", "")
-    env["CFLAGS"] = cross_compile.get("cflags", "")
-    env["LDFLAGS"] = cross_compile.get("ldflags", "")
+    if toolchain["prefix"]:
+        env["CROSS_COMPILE"] = toolchain["prefix"]
+    env["CFLAGS"] = toolchain["cflags"]
+    env["LDFLAGS"] = toolchain["ldflags"]
 
 
 
     # 1️⃣ defconfig created
-    run_command_live(["make", "defconfig"], cwd=busybox_src_dir, env=env, desc="BusyBox defconfig erstellen")
+    run_command_live(["make", "defconfig", *toolchain["make_args"]], cwd=busybox_src_dir, env=env, desc="BusyBox defconfig erstellen")
 
     # 2️⃣ .config patch (TC deactivated + optional extra_cfg)
     print("Console > Patching Busybox's: -> .config - file !.. .. . \n With:")
     patch_dict = parse_patch_list(config["config_patch"])
     print(patch_dict)
     print(extra_cfg)
-    patch_config(busybox_src_dir, {**DEFAULT_PATCH, **config_patch_dict, **extra_cfg})
+    bootprof_patch = BOOTPROF_PATCH if args.boot_profile else {}
+    patch_config(busybox_src_dir, {**DEFAULT_PATCH, **config_patch_dict, **extra_cfg, **bootprof_patch})
 
     
     # 3️⃣ oldconfig non-interaktiv
     run_command_live(
-        ["make", "oldconfig", "KCONFIG_ALLCONFIG=/dev/null"],
+        ["make", "oldconfig", "KCONFIG_ALLCONFIG=/dev/null", *toolchain["make_args"]],
         cwd=busybox_src_dir,
         env=env,
         desc="BusyBox oldconfig (non-interaktiv)"
@@ -133,10 +142,10 @@ def build_busybox(work_dir: Path, downloads_dir: Path, rootfs_dir: Path, args):
     print(f"Detected: {num_cores}")
     
     print(f"Console > Compiling BusyBox with {num_cores} Cores...")
-    run_command_live(["make", f"-j{num_cores}"], cwd=busybox_src_dir, env=env, desc="BusyBox kompilieren")
+    run_command_live(["make", f"-j{num_cores}", *toolchain["make_args"]], cwd=busybox_src_dir, env=env, desc="BusyBox kompilieren")
 
     # 5️⃣ Installation ins RootFS
-    run_command_live(["make", f"CONFIG_PREFIX={rootfs_dir}", "install"], cwd=busybox_src_dir, env=env, desc="BusyBox installieren")
+    run_command_live(["make", f"CONFIG_PREFIX={rootfs_dir}", "install", *toolchain["make_args"]], cwd=busybox_src_dir, env=env, desc="BusyBox installieren")
 
     print(f"✅ BusyBox {version} successfully installed in {rootfs_dir}")
     
@@ -0,0 +1,241 @@
+import os
+import uuid
+import zlib
+import struct
+from pathlib import Path
+from utils.load import load_config
+from utils.execute import run_command_live
+from utils.fat import build_fat32
+from utils.sparse import copy_sparse, write_android_sparse, write_bmap
+
+SECTOR_SIZE = 512
+MIB = 1024 * 1024
+
+# GPT: 128 Einträge à 128 Bytes = 32 Sektoren
+GPT_ENTRIES = 128
+GPT_ENTRY_SIZE = 128
+GPT_ENTRY_SECTORS = GPT_ENTRIES * GPT_ENTRY_SIZE // SECTOR_SIZE
+GPT_HEADER = struct.Struct("<8sIIIIQQQQ16sQIII")
+GPT_ENTRY = struct.Struct("<16s16sQQQ72s")
+MBR_ENTRY = struct.Struct("<B3sB3sII")
+
+# Partitionstypen: (GPT Typ-GUID, MBR Typ-Byte)
+PARTITION_TYPES = {
+    "esp": ("C12A7328-F81F-11D2-BA4B-00A0C93EC93B", 0xEF),
+    "fat32": ("EBD0A0A2-B9E5-4433-87C0-68B6B72699C7", 0x0C),
+    "linux": ("0FC63DAF-8483-4772-8E79-3D69D8477DE4", 0x83),
+}
+
+# Discoverable Partitions Spec: Root-Partition je Architektur
+ROOT_TYPES = {
+    "arm64": "B921B045-1DF0-41C3-AF44-4C6F280D3FAE",
+    "arm": "69DAD710-2CE4-4E3C-B16C-21A1D49ABED3",
+    "x86_64": "4F68BCE3-E8CD-4DB1-96E7-FBCAF984B709",
+    "i386": "44479540-F297-41B2-9AF7-D131D5F0458A",
+}
+
+GPT_ATTR_LEGACY_BOOTABLE = 1 << 2
+
+
+def align_up(value: int, alignment: int) -> int:
+    return -(-value // alignment) * alignment
+
+
+def tree_size(path: Path) -> int:
+    """Summiert die Dateigrößen unterhalb von path (ohne Symlinks zu folgen)"""
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            f = Path(dirpath) / name
+            if not f.is_symlink():
+                total += f.lstat().st_size
+    return total
+
+
+def tree_mtime(path: Path) -> float:
+    """Jüngste Änderungszeit unterhalb von path (Dateien, Verzeichnisse und Symlinks)"""
+    newest = path.lstat().st_mtime
+    for dirpath, dirnames, filenames in os.walk(path):
+        for name in dirnames + filenames:
+            newest = max(newest, (Path(dirpath) / name).lstat().st_mtime)
+    return newest
+
+
+def build_rootfs_image(rootfs_dir: Path, image: Path, fstype: str, size_mb: int, label: str,
+                       prebuilt: bool = False) -> Path:
+    """Erstellt das RootFS-Image via mke2fs -d, außer es ist extern geliefert oder aktueller als rootfs_dir"""
+    if prebuilt:
+        if not image.exists():
+            raise FileNotFoundError(f"Externes RootFS-Image nicht gefunden: {image}")
+        print(f"Console > Verwende externes RootFS-Image: {image}")
+        return image
+
+    if image.exists() and image.stat().st_mtime > tree_mtime(rootfs_dir):
+        print(f"Console > RootFS-Image aktuell: {image}")
+        return image
+
+    if not size_mb:
+        # Automatisch: Inhalt + 50% Reserve, mindestens 64 MiB
+        size_mb = max(64, align_up(tree_size(rootfs_dir) * 3 // 2, MIB) // MIB + 16)
+
+    # In eine temporäre Datei bauen und erst bei Erfolg das alte Image ersetzen
+    image.parent.mkdir(parents=True, exist_ok=True)
+    tmp_image = image.with_name(image.name + ".tmp")
+    tmp_image.unlink(missing_ok=True)
+    run_command_live(
+        ["mke2fs", "-q", "-F", "-t", fstype, "-L", label, "-d", str(rootfs_dir), str(tmp_image), f"{size_mb}M"],
+        desc=f"RootFS-Image ({fstype}, {size_mb} MiB) erstellen"
+    )
+    os.replace(tmp_image, image)
+    return image
+
+
+def gpt_entries(partitions: list[dict]) -> bytes:
+    table = bytearray(GPT_ENTRIES * GPT_ENTRY_SIZE)
+    for i, part in enumerate(partitions):
+        GPT_ENTRY.pack_into(
+            table, i * GPT_ENTRY_SIZE,
+            uuid.UUID(part["type_guid"]).bytes_le,
+            part["guid"].bytes_le,
+            part["start"] // SECTOR_SIZE,
+            (part["start"] + part["size"]) // SECTOR_SIZE - 1,
+            part.get("attributes", 0),
+            part["label"].encode("utf-16-le")[:72],
+        )
+    return bytes(table)
+
+
+def gpt_header(current: int, backup: int, entries_lba: int, first_usable: int, last_usable: int,
+               disk_guid: uuid.UUID, entries_crc: int) -> bytes:
+    fields = [
+        b"EFI PART", 0x00010000, GPT_HEADER.size, 0, 0,
+        current, backup, first_usable, last_usable, disk_guid.bytes_le,
+        entries_lba, GPT_ENTRIES, GPT_ENTRY_SIZE, entries_crc,
+    ]
+    fields[3] = zlib.crc32(GPT_HEADER.pack(*fields))
+    return GPT_HEADER.pack(*fields).ljust(SECTOR_SIZE, b"\x00")
+
+
+def mbr(partitions: list[dict], disk_signature: int) -> bytes:
+    sector = bytearray(SECTOR_SIZE)
+    struct.pack_into("<I", sector, 440, disk_signature)
+    for i, part in enumerate(partitions):
+        MBR_ENTRY.pack_into(
+            sector, 446 + i * MBR_ENTRY.size,
+            part.get("status", 0), b"\xFE\xFF\xFF", part["mbr_type"], b"\xFE\xFF\xFF",
+            part["start"] // SECTOR_SIZE, part["size"] // SECTOR_SIZE,
+        )
+    sector[510:512] = b"\x55\xAA"
+    return bytes(sector)
+
+
+def write_partition_table(fd: int, table: str, partitions: list[dict], disk_size: int):
+    """Schreibt GPT (inkl. Protective MBR und Backup) oder eine klassische MBR Tabelle"""
+    last_lba = disk_size // SECTOR_SIZE - 1
+
+    if table == "mbr":
+        if len(partitions) > 4:
+            raise ValueError("MBR unterstützt maximal 4 primäre Partitionen")
+        os.pwrite(fd, mbr(partitions, uuid.uuid4().int & 0xFFFFFFFF), 0)
+        return
+
+    if table != "gpt":
+        raise ValueError(f"Unbekannte Partitionstabelle: {table}")
+
+    protective = [{
+        "mbr_type": 0xEE, "start": SECTOR_SIZE,
+        "size": min(last_lba, 0xFFFFFFFF) * SECTOR_SIZE,
+    }]
+    os.pwrite(fd, mbr(protective, 0), 0)
+
+    entries = gpt_entries(partitions)
+    entries_crc = zlib.crc32(entries)
+    disk_guid = uuid.uuid4()
+    first_usable = 2 + GPT_ENTRY_SECTORS
+    last_usable = last_lba - 1 - GPT_ENTRY_SECTORS
+    backup_entries_lba = last_lba - GPT_ENTRY_SECTORS
+
+    os.pwrite(fd, gpt_header(1, last_lba, 2, first_usable, last_usable, disk_guid, entries_crc), SECTOR_SIZE)
+    os.pwrite(fd, entries, 2 * SECTOR_SIZE)
+    os.pwrite(fd, entries, backup_entries_lba * SECTOR_SIZE)
+    os.pwrite(fd, gpt_header(last_lba, 1, backup_entries_lba, first_usable, last_usable, disk_guid, entries_crc),
+              last_lba * SECTOR_SIZE)
+
+
+def build_image(bootfs_dir: Path, rootfs_dir: Path, output_dir: Path, args):
+    """Erstellt ein partitioniertes, sparse Disk-Image aus BootFS und RootFS-Image"""
+
+    # Load Config
+    config = load_config(Path("configs") / args.image_config)
+    arch = args.arch or load_config(Path("configs") / args.config).get("cross_compile", {}).get("arch", "arm64")
+    table = config.get("table", "gpt")
+    alignment = config.get("alignment_mb", 1) * MIB
+    boot_cfg = config.get("boot", {})
+    root_cfg = config.get("rootfs", {})
+    sparse_output = args.sparse_output or config.get("sparse_output", "none")
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    bootfs_dir.mkdir(parents=True, exist_ok=True)
+    image_path = output_dir / f"{config.get('name', 'blackzos-{arch}').format(arch=arch)}.img"
+
+    # RootFS-Image
+    rootfs_image = build_rootfs_image(
+        rootfs_dir=rootfs_dir,
+        image=Path(root_cfg.get("image", "work/build/rootfs.img")),
+        fstype=root_cfg.get("fstype", "ext4"),
+        size_mb=root_cfg.get("size_mb", 0),
+        label=root_cfg.get("label", "rootfs"),
+        prebuilt=root_cfg.get("prebuilt", False),
+    )
+
+    # Layout berechnen
+    boot_type = PARTITION_TYPES[boot_cfg.get("type", "esp")]
+    boot = {
+        "label": boot_cfg.get("label", "BOOT"),
+        "type_guid": boot_type[0],
+        "mbr_type": boot_type[1],
+        "guid": uuid.uuid4(),
+        "status": 0x80,
+        "attributes": GPT_ATTR_LEGACY_BOOTABLE,
+        "start": alignment,
+        "size": align_up(boot_cfg.get("size_mb", 128) * MIB, alignment),
+    }
+    root = {
+        "label": root_cfg.get("label", "rootfs"),
+        "type_guid": ROOT_TYPES.get(arch, PARTITION_TYPES["linux"][0]),
+        "mbr_type": PARTITION_TYPES["linux"][1],
+        "guid": uuid.uuid4(),
+        "start": boot["start"] + boot["size"],
+        "size": align_up(rootfs_image.stat().st_size, alignment),
+    }
+    # Platz für die Backup-GPT am Ende
+    disk_size = root["start"] + root["size"] + alignment
+
+    print(f"Console > Disk-Image {image_path} ({table.upper()}, {disk_size // MIB} MiB)")
+    print(f"Console >   {boot['label']}: {boot['start'] // MIB} MiB + {boot['size'] // MIB} MiB")
+    print(f"Console >   {root['label']}: {root['start'] // MIB} MiB + {root['size'] // MIB} MiB")
+
+    # Image neu anlegen: ftruncate erzeugt eine reine Lochdatei, es werden nur Daten geschrieben
+    if image_path.exists():
+        image_path.unlink()
+    fd = os.open(image_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.ftruncate(fd, disk_size)
+        write_partition_table(fd, table, [boot, root], disk_size)
+        build_fat32(bootfs_dir, fd, boot["start"], boot["size"], label=boot["label"])
+        written = copy_sparse(rootfs_image, fd, root["start"])
+        print(f"Console > RootFS eingebettet: {written // MIB} MiB Daten geschrieben")
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+    # Optionale Sparse-Ausgaben für Flash-Tools
+    if sparse_output == "android":
+        write_android_sparse(image_path, image_path.with_suffix(".simg"))
+    elif sparse_output == "bmap":
+        write_bmap(image_path, image_path.with_suffix(".bmap"))
+    elif sparse_output != "none":
+        raise ValueError(f"Unbekanntes Sparse-Format: {sparse_output}")
+
+    print(f"✅ Disk-Image erstellt: {image_path}")
+    return image_path
@@ -0,0 +1,190 @@
+import sys
+import json
+import shutil
+import hashlib
+import tempfile
+import subprocess
+from pathlib import Path
+from utils.load import load_config
+from utils.arch import host_arch
+
+# Bekannte Compiler-Präfixe je Architektur, in Suchreihenfolge (nativer gcc wird vorangestellt)
+TOOLCHAIN_PREFIXES = {
+    "x86_64": ["x86_64-linux-gnu-", "x86_64-linux-musl-"],
+    "arm64": ["aarch64-linux-gnu-", "aarch64-linux-musl-", "aarch64-none-linux-gnu-"],
+    "arm": ["arm-linux-gnueabihf-", "arm-linux-musleabihf-"],
+    "i386": ["i686-linux-gnu-", "i686-linux-musl-"],
+}
+
+TEST_SOURCE = "int main(void) { return 0; }\n"
+# Link-Test ohne libc, damit auch Cross-Compiler ohne Sysroot geprüft werden können
+TEST_LINK_SOURCE = "void _start(void) { for (;;); }\n"
+
+
+def file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def query(gcc: str, option: str) -> str:
+    result = subprocess.run([gcc, option], capture_output=True, text=True)
+    return result.stdout.strip() if result.returncode == 0 else ""
+
+
+def trial_compile(gcc: str, flag: str) -> bool:
+    """Prüft per Testkompilat, ob gcc den Flag akzeptiert (Linker-Flags und LTO per Link-Test)"""
+    link = flag.startswith("-Wl,") or flag.startswith("-flto")
+    with tempfile.TemporaryDirectory() as tmp:
+        src = Path(tmp) / "probe.c"
+        src.write_text(TEST_LINK_SOURCE if link else TEST_SOURCE)
+        cmd = [gcc, "-Werror", flag, str(src), "-o", str(Path(tmp) / "probe")]
+        if link:
+            cmd += ["-nostdlib", "-nostartfiles"]
+        else:
+            cmd.append("-c")
+        return subprocess.run(cmd, capture_output=True).returncode == 0
+
+
+def load_cache(cache_file: Path) -> dict:
+    if cache_file.exists():
+        return load_config(cache_file)
+    return {}
+
+
+def save_cache(cache_file: Path, cache: dict):
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    cache_file.write_text(json.dumps(cache, indent=2, sort_keys=True) + "\n")
+
+
+def probe_compiler(gcc: str, flags: list, cache: dict) -> dict:
+    """Probt einen Compiler einmalig; Ergebnisse werden über den Hash der Binärdatei gecacht"""
+    gcc_path = Path(shutil.which(gcc)).resolve()
+    key = file_hash(gcc_path)
+    entry = cache.get(key)
+    if entry is None:
+        print(f"Console > Probe Toolchain {gcc} ({gcc_path}) ...")
+        entry = {
+            "path": str(gcc_path),
+            "version": query(gcc, "-dumpfullversion") or query(gcc, "-dumpversion"),
+            "target": query(gcc, "-dumpmachine"),
+            "sysroot": query(gcc, "-print-sysroot"),
+            "flags": {},
+        }
+        cache[key] = entry
+
+    missing = [flag for flag in flags if flag not in entry["flags"]]
+    for flag in missing:
+        entry["flags"][flag] = trial_compile(gcc, flag)
+    if missing:
+        supported = [flag for flag in missing if entry["flags"][flag]]
+        print(f"Console > {gcc}: {len(supported)}/{len(missing)} Flags unterstützt")
+    return entry
+
+
+def find_compiler(arch: str, preferred: str | None = None) -> str | None:
+    """Sucht das erste vorhandene Compiler-Präfix für arch (preferred zuerst)"""
+    candidates = list(TOOLCHAIN_PREFIXES.get(arch, []))
+    if host_arch() == arch:
+        candidates.insert(0, "")
+    if preferred is not None:
+        candidates.insert(0, preferred)
+    for prefix in candidates:
+        if shutil.which(f"{prefix}gcc"):
+            return prefix
+    return None
+
+
+def expand_profile(profile: dict, board: dict) -> tuple[list, list]:
+    """Setzt Board-Werte ({march}, {mtune}) in die Profil-Flags ein; Flags ohne Board-Wert entfallen"""
+    def expand(flags):
+        result = []
+        for flag in flags:
+            try:
+                result.append(flag.format(**board))
+            except KeyError:
+                continue
+        return result
+    return expand(profile.get("cflags", [])), expand(profile.get("ldflags", []))
+
+
+def select_toolchain(arch: str, cross_compile: dict, args) -> dict:
+    """
+    Wählt und probt die Toolchain für arch und baut CFLAGS/LDFLAGS aus dem gewählten Profil.
+
+    :param arch: Zielarchitektur, z.B. 'arm64', 'x86_64'
+    :param cross_compile: 'cross_compile' Abschnitt der BusyBox Konfig
+    :param args: CLI Argumente (toolchain_config, profile, board)
+    :return: dict mit prefix, version, target, sysroot, cflags, ldflags, make_args
+    """
+    config = load_config(Path("configs") / args.toolchain_config)
+    cache_file = Path(config.get("cache", "work/toolchains.json"))
+
+    board_name = args.board or cross_compile.get("board")
+    profile_name = args.profile or cross_compile.get("profile")
+    boards = config.get("boards", {})
+    profiles = config.get("profiles", {})
+    if board_name and board_name not in boards:
+        print(f"Fehler: Unbekanntes Board '{board_name}'. Verfügbar: {', '.join(boards)}")
+        sys.exit(1)
+    if profile_name and profile_name not in profiles:
+        print(f"Fehler: Unbekanntes Flag-Profil '{profile_name}'. Verfügbar: {', '.join(profiles)}")
+        sys.exit(1)
+    board = boards.get(board_name, {}) if board_name else {}
+    if board and board.get("arch", arch) != arch:
+        print(f"Fehler: Board '{board_name}' ist {board['arch']}, Ziel ist {arch}.")
+        sys.exit(1)
+
+    # Compiler finden, bevor irgendetwas heruntergeladen oder gebaut wird
+    # Konfiguriertes Präfix nur, wenn es zur Zielarchitektur gehört (--arch kann sie überschreiben)
+    preferred = cross_compile.get("compiler_prefix") if cross_compile.get("arch", arch) == arch else None
+    prefix = find_compiler(arch, preferred)
+    if prefix is None:
+        tried = ", ".join(f"{p}gcc" for p in TOOLCHAIN_PREFIXES.get(arch, [])) or "-"
+        print(f"Fehler: Kein Compiler für Architektur {arch} gefunden (gesucht: {tried}).")
+        sys.exit(1)
+    gcc = f"{prefix}gcc"
+
+    cflags = cross_compile.get("cflags", "").split()
+    ldflags = cross_compile.get("ldflags", "").split()
+    profile_cflags, profile_ldflags = expand_profile(profiles.get(profile_name, {}), board)
+    probe_flags = config.get("probe_flags", {})
+    flags = probe_flags.get("common", []) + probe_flags.get(arch, []) + profile_cflags + profile_ldflags
+
+    cache = load_cache(cache_file)
+    entry = probe_compiler(gcc, list(dict.fromkeys(flags)), cache)
+    save_cache(cache_file, cache)
+
+    # Nicht unterstützte Profil-Flags verwerfen statt make später scheitern zu lassen
+    for flag in profile_cflags + profile_ldflags:
+        if not entry["flags"].get(flag):
+            print(f"[WARN] {gcc} unterstützt {flag} nicht; Flag wird ignoriert.")
+    profile_cflags = [flag for flag in profile_cflags if entry["flags"].get(flag)]
+    if any(flag.startswith("-O") for flag in profile_cflags):
+        # Optimierungsstufe des Profils ersetzt die aus der BusyBox Konfig
+        cflags = [flag for flag in cflags if not flag.startswith("-O")]
+    cflags += profile_cflags
+    ldflags += [flag for flag in profile_ldflags if entry["flags"].get(flag)]
+
+    # LTO braucht die Plugin-Wrapper für statische Archive
+    make_args = []
+    if "-flto" in cflags:
+        for tool, var in (("gcc-ar", "AR"), ("gcc-nm", "NM")):
+            if shutil.which(f"{prefix}{tool}"):
+                make_args.append(f"{var}={prefix}{tool}")
+
+    print(f"Console > Toolchain: {gcc} {entry['version']} ({entry['target']})"
+          + (f", Board {board_name}" if board_name else "")
+          + (f", Profil {profile_name}" if profile_name else ""))
+
+    return {
+        "prefix": prefix,
+        "version": entry["version"],
+        "target": entry["target"],
+        "sysroot": entry["sysroot"],
+        "cflags": " ".join(cflags),
+        "ldflags": " ".join(ldflags),
+        "make_args": make_args,
+    }
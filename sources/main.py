@@ -1,6 +1,7 @@
 import argparse
 import multiprocessing
 import os
+import sys
 import json 
 
 from pathlib import Path
@@ -17,6 +18,8 @@ from utils.load import load_config
 
 from core.busybox import build_busybox
 from core.modify_rootfs import chroot
+from core.image import build_image
+from core.bootprof import profile_boot
 
 
 
@@ -37,6 +40,15 @@ def parse():
     parser = argparse.ArgumentParser(description="BusyBox Build System")
     parser.add_argument("--config", type=str, default="busybox.json", help="Pfad zur BusyBox JSON Konfig")
     parser.add_argument("--arch", type=str, help="Überschreibe die Zielarchitektur (z.B. arm64, x86_64)")
+    parser.add_argument("--board", type=str, help="Board für die Compiler-Flags (z.B. rpi4, generic-x86_64)")
+    parser.add_argument("--profile", type=str, help="Compiler-Flag-Profil (z.B. size, speed, lto-gc)")
+    parser.add_argument("--toolchain-config", type=str, default="toolchain.json", help="Pfad zur Toolchain JSON Konfig")
+    parser.add_argument("--image", action="store_true", help="Erstelle ein partitioniertes Disk-Image aus BootFS und RootFS")
+    parser.add_argument("--image-config", type=str, default="image.json", help="Pfad zur Image JSON Konfig")
+    parser.add_argument("--sparse-output", type=str, choices=["none", "android", "bmap"], help="Zusätzliche Sparse-Ausgabe für Flash-Tools")
+    parser.add_argument("--boot-profile", action="store_true", help="Instrumentiertes init/rcS erzeugen und Boot-Zeiten in einer Namespace-Sandbox messen")
+    parser.add_argument("--boot-config", type=str, default="bootprof.json", help="Pfad zur Boot-Profiling JSON Konfig")
+    parser.add_argument("--update-baseline", action="store_true", help="Gemessene Boot-Zeiten als neue Baseline speichern")
     args = parser.parse_args()
     return args
 
@@ -61,9 +73,9 @@ def configs(args):
 def create_rootfs(args):
     print("[*] Starte RootFS-Erstellung...")
     create_directories()
-    create_etc_files()
+    create_etc_files(instrument=args.boot_profile)
     create_dev_nodes()
-    create_busybox_init()
+    create_busybox_init(instrument=args.boot_profile)
     create_symlinks()
     copy_qemu_user_static(arch=args.arch)
     set_rootfs_permissions()
@@ -82,6 +94,20 @@ def busybox(args):
     print("[+] Fertig! RootFS und BusyBox sind erstellt.")
 
 
+def boot_profile(args):
+    print("[*] Starte Boot-Profiling...")
+    if not profile_boot(rootfs_dir=rootfs_dir, args=args):
+        sys.exit(1)
+
+
+def image(args):
+    print("[*] Starte Image-Erstellung...")
+    build_image(
+        bootfs_dir=bootfs_dir,
+        rootfs_dir=rootfs_dir,
+        output_dir=output_dir,
+        args=args
+    )
 
 
 # ---------------------------
@@ -96,6 +122,12 @@ def main():
     create_rootfs(args=args)
     # Downloads, Extracts, Configures, Compiles & Finnaly Installs Busybox into the RootFS
     busybox(args=args)
+    # Measures the instrumented init/rcS steps against the stored baseline
+    if args.boot_profile:
+        boot_profile(args=args)
+    # Assembles the partitioned Disk-Image (BootFS + RootFS) into work/output
+    if args.image:
+        image(args=args)
     
     chroot(busybox_src_dir=busybox_src_dir, rootfs_dir=rootfs_dir, arch=args.arch)
 
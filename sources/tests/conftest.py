@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Module werden wie in main.py als 'utils.*' / 'core.*' importiert
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,103 @@
+import pytest
+
+from core.bootprof import compare_baseline, missing_steps, parse_boot_log
+from utils.create import (
+    boot_script_tail, bootprof_prologue, etc_files, init_script_content, init_steps, rcs_steps, render_boot_script,
+)
+
+# Boot-Skripte vor der Aufteilung in Schritte: ohne Profiling muss die Ausgabe identisch bleiben
+PLAIN_RCS = """#!/bin/sh
+echo "[rcS] Mounting pseudo filesystems..."
+mount -t proc none /proc || echo "[rcS] Warning: /proc mount failed"
+mount -t sysfs none /sys || echo "[rcS] Warning: /sys mount failed"
+mount -t devtmpfs devtmpfs /dev || echo "[rcS] Warning: /dev mount failed"
+mount -t tmpfs tmpfs /tmp || echo "[rcS] Warning: /tmp mount failed"
+mount -t tmpfs tmpfs /run || echo "[rcS] Warning: /run mount failed"
+mkdir -p /run/lock
+
+if [ -x /sbin/mdev ]; then
+    echo "/sbin/mdev" > /proc/sys/kernel/hotplug 2>/dev/null
+    /sbin/mdev -s
+fi
+
+ifconfig lo up
+echo "[rcS] Boot complete."
+exec /bin/sh
+"""
+
+PLAIN_INIT = """#!/bin/sh
+echo "Starting minimal BusyBox init..."
+mount -t proc none /proc
+mount -t sysfs none /sys
+echo "Root filesystem ready."
+exec /bin/sh
+"""
+
+
+def test_plain_scripts_unchanged():
+    assert etc_files["init.d/rcS"] == PLAIN_RCS
+    assert init_script_content == PLAIN_INIT
+    assert render_boot_script("rcS", rcs_steps) == PLAIN_RCS
+    assert render_boot_script("init", init_steps) == PLAIN_INIT
+
+
+@pytest.mark.parametrize("name, steps", [("rcS", rcs_steps), ("init", init_steps)])
+def test_instrumented_script_marks_each_step(name, steps):
+    script = render_boot_script(name, steps, instrument=True)
+    assert script.startswith("#!/bin/sh\n" + bootprof_prologue)
+    assert script.endswith(f"_bp_mark {name} end\n_bp_flush\n" + boot_script_tail)
+
+    pos = len("#!/bin/sh\n" + bootprof_prologue)
+    for step, code in steps:
+        expected = f"_bp_mark {name} {step}\n{code}"
+        assert script[pos:pos + len(expected)] == expected
+        pos += len(expected)
+
+    # Ohne die Marker bleibt das ursprüngliche Skript übrig
+    body = script.replace(bootprof_prologue, "")
+    body = "".join(line for line in body.splitlines(keepends=True) if not line.startswith("_bp_"))
+    assert body == render_boot_script(name, steps)
+
+
+def test_parse_boot_log_out_of_order_and_malformed():
+    log = "\n".join([
+        "rcS 3 100.0300 mount_dev",
+        "init 1 50.000 banner",
+        "rcS 1 100.0000 mount_proc",
+        "garbage",
+        "rcS 2 kaputt%N mount_sys",
+        "",
+        "rcS 2 100.0100 mount_sys",
+        "rcS 4 100.0600 end",
+        "init 2 50.005 end extra",
+    ])
+    result = parse_boot_log(log)
+
+    assert set(result) == {"rcS:mount_proc", "rcS:mount_sys", "rcS:mount_dev", "rcS:total"}
+    assert result["rcS:mount_proc"] == pytest.approx(10.0)
+    assert result["rcS:mount_sys"] == pytest.approx(20.0)
+    assert result["rcS:mount_dev"] == pytest.approx(30.0)
+    assert result["rcS:total"] == pytest.approx(60.0)
+
+
+def test_parse_boot_log_single_mark_has_no_total():
+    assert parse_boot_log("init 1 50.000 banner\n") == {}
+
+
+def test_compare_baseline_tolerance_and_noise_floor():
+    baseline = {"slow": 10.0, "noise": 1.0, "within": 10.0, "faster": 10.0}
+    results = {
+        "slow": 15.0,     # +50 %, +5 ms: Regression
+        "noise": 2.5,     # +150 %, aber nur +1.5 ms: unter min_delta_ms
+        "within": 12.4,   # +24 %: innerhalb der Toleranz
+        "faster": 5.0,
+        "new": 100.0,     # nicht in der Baseline
+    }
+    assert compare_baseline(results, baseline, 0.25, 2.0) == [("slow", 10.0, 15.0)]
+    assert compare_baseline(results, baseline, 0.25, 1.0) == [("slow", 10.0, 15.0), ("noise", 1.0, 2.5)]
+    assert compare_baseline(results, baseline, 0.6, 2.0) == []
+
+
+def test_missing_steps():
+    assert missing_steps({"a": 1.0}, {"a": 1.0, "b": 2.0}) == ["b"]
+    assert missing_steps({"a": 1.0, "c": 3.0}, {"a": 1.0}) == []
@@ -0,0 +1,139 @@
+import os
+import struct
+
+from utils.fat import (
+    ATTR_DIRECTORY, ATTR_LFN, ATTR_VOLUME_ID, BOOT_SECTOR, DIR_ENTRY, FAT_EOC, LFN_ENTRY, SECTOR_SIZE,
+    _exact_short_name, _generate_short_name, _lfn_checksum, _lfn_entries, build_fat32,
+)
+
+
+def decode_lfn(entries: list) -> tuple[str, int]:
+    """Setzt einen Namen aus LFN-Einträgen (Schreibreihenfolge) zusammen"""
+    parts = []
+    checksums = set()
+    for raw in reversed(entries):
+        _, name1, attr, _, checksum, name2, cluster, name3 = LFN_ENTRY.unpack(raw)
+        assert attr == ATTR_LFN and cluster == 0
+        checksums.add(checksum)
+        parts.append(name1 + name2 + name3)
+    assert len(checksums) == 1
+    units = b"".join(parts)
+    chars = [units[i:i + 2] for i in range(0, len(units), 2)]
+    if b"\x00\x00" in chars:
+        chars = chars[:chars.index(b"\x00\x00")]
+    return b"".join(chars).decode("utf-16-le"), checksums.pop()
+
+
+def read_fat32(data: bytes) -> dict:
+    """Minimaler FAT32 Leser: liefert {pfad: inhalt} bzw. {pfad/: None} für Verzeichnisse"""
+    bs = BOOT_SECTOR.unpack_from(data)
+    spc, reserved, fats, fat_sectors, root_cluster = bs[3], bs[4], bs[5], bs[14], bs[17]
+    assert bs[2] == SECTOR_SIZE and bs[26] == b"FAT32   " and data[510:512] == b"\x55\xAA"
+    fat_start = reserved * SECTOR_SIZE
+    data_start = (reserved + fats * fat_sectors) * SECTOR_SIZE
+    cluster_bytes = spc * SECTOR_SIZE
+
+    def fat(cluster):
+        return struct.unpack_from("<I", data, fat_start + cluster * 4)[0] & 0x0FFFFFFF
+
+    def chain(cluster):
+        out = b""
+        while cluster < 0x0FFFFFF8:
+            pos = data_start + (cluster - 2) * cluster_bytes
+            out += data[pos:pos + cluster_bytes]
+            cluster = fat(cluster)
+        return out
+
+    tree = {}
+
+    def walk(cluster, prefix):
+        raw = chain(cluster)
+        lfn = []
+        for pos in range(0, len(raw), DIR_ENTRY.size):
+            entry = raw[pos:pos + DIR_ENTRY.size]
+            if entry[0] == 0:
+                break
+            if entry[11] == ATTR_LFN:
+                lfn.append(entry)
+                continue
+            short, attr, *_, hi, _, _, lo, size = DIR_ENTRY.unpack(entry)
+            if attr & ATTR_VOLUME_ID or short in (b".".ljust(11), b"..".ljust(11)):
+                lfn = []
+                continue
+            if lfn:
+                name, checksum = decode_lfn(lfn)
+                assert checksum == _lfn_checksum(short)
+            else:
+                base, ext = short[:8].decode().rstrip(), short[8:].decode().rstrip()
+                name = f"{base}.{ext}" if ext else base
+            lfn = []
+            child = (hi << 16) | lo
+            if attr & ATTR_DIRECTORY:
+                tree[prefix + name + "/"] = None
+                walk(child, prefix + name + "/")
+            else:
+                tree[prefix + name] = chain(child)[:size] if child else b""
+
+    walk(root_cluster, "")
+    assert fat(0) == 0x0FFFFFF8 and fat(1) == FAT_EOC
+    return tree
+
+
+def test_exact_short_name():
+    assert _exact_short_name("KERNEL8.IMG") == b"KERNEL8 IMG"
+    assert _exact_short_name("BOOT") == b"BOOT       "
+    assert _exact_short_name("config.txt") is None
+    assert _exact_short_name("LONGNAME9.BIN") is None
+    assert _exact_short_name(".hidden") is None
+
+
+def test_generate_short_name_unique():
+    taken = set()
+    names = ["bcm2711-rpi-4-b.dtb", "bcm2711-rpi-400.dtb", "bcm2711-rpi-cm4.dtb", ".hidden file"]
+    for name in names:
+        short = _generate_short_name(name, taken)
+        assert len(short) == 11 and short not in taken
+        assert all(c in b"ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789$%'-_@~`!(){}^#& " for c in short)
+        taken.add(short)
+    assert _generate_short_name("bcm2711-rpi-4-b.dtb", set()) == b"BCM271~1DTB"
+    assert _generate_short_name("bcm2711-rpi-4-b.dtb", {b"BCM271~1DTB"}) == b"BCM271~2DTB"
+
+
+def test_lfn_entries_round_trip():
+    short = b"BCM271~1DTB"
+    for name in ["config.txt", "a" * 13, "bcm2711-rpi-4-b.dtb", "überlänge_ä" * 5]:
+        entries = _lfn_entries(name, short)
+        assert len(entries) == -(-len(name) // 13)
+        orders = [LFN_ENTRY.unpack(e)[0] for e in entries]
+        assert orders[0] == 0x40 | len(entries)
+        assert [o & 0x3F for o in orders] == list(range(len(entries), 0, -1))
+        decoded, checksum = decode_lfn(entries)
+        assert decoded == name
+        assert checksum == _lfn_checksum(short)
+
+
+def test_build_fat32_round_trip(tmp_path):
+    src = tmp_path / "bootfs"
+    (src / "overlays").mkdir(parents=True)
+    files = {
+        "config.txt": b"arm_64bit=1\n",
+        "KERNEL8.IMG": os.urandom(5000),
+        "bcm2711-rpi-4-b.dtb": os.urandom(300000),
+        "EMPTY": b"",
+        "overlays/README": b"overlays\n",
+        "overlays/vc4-kms-v3d-pi4.dtbo": bytes(8192) + b"tail",
+    }
+    for name, content in files.items():
+        (src / name).write_bytes(content)
+
+    size = 64 * 1024 * 1024
+    image = tmp_path / "boot.img"
+    fd = os.open(image, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        os.ftruncate(fd, size)
+        build_fat32(src, fd, 0, size, label="BOOT")
+    finally:
+        os.close(fd)
+
+    tree = read_fat32(image.read_bytes())
+    assert tree == {**files, "overlays/": None}
@@ -0,0 +1,88 @@
+import os
+import uuid
+import zlib
+import struct
+
+from core.image import (
+    GPT_ENTRIES, GPT_ENTRY, GPT_ENTRY_SIZE, GPT_ENTRY_SECTORS, GPT_HEADER, MIB, PARTITION_TYPES,
+    SECTOR_SIZE, gpt_entries, gpt_header, write_partition_table,
+)
+
+
+def make_partitions():
+    return [
+        {"label": "BOOT", "type_guid": PARTITION_TYPES["esp"][0], "mbr_type": 0xEF,
+         "guid": uuid.uuid4(), "status": 0x80, "attributes": 4, "start": MIB, "size": 8 * MIB},
+        {"label": "rootfs", "type_guid": PARTITION_TYPES["linux"][0], "mbr_type": 0x83,
+         "guid": uuid.uuid4(), "start": 9 * MIB, "size": 16 * MIB},
+    ]
+
+
+def parse_header(sector: bytes) -> list:
+    fields = list(GPT_HEADER.unpack(sector[:GPT_HEADER.size]))
+    crc = fields[3]
+    fields[3] = 0
+    assert zlib.crc32(GPT_HEADER.pack(*fields)) == crc
+    fields[3] = crc
+    return fields
+
+
+def test_gpt_entries_round_trip():
+    partitions = make_partitions()
+    table = gpt_entries(partitions)
+    assert len(table) == GPT_ENTRIES * GPT_ENTRY_SIZE
+
+    for i, part in enumerate(partitions):
+        type_guid, guid, first, last, attrs, name = GPT_ENTRY.unpack_from(table, i * GPT_ENTRY_SIZE)
+        assert uuid.UUID(bytes_le=type_guid) == uuid.UUID(part["type_guid"])
+        assert uuid.UUID(bytes_le=guid) == part["guid"]
+        assert first == part["start"] // SECTOR_SIZE
+        assert (last + 1) * SECTOR_SIZE == part["start"] + part["size"]
+        assert attrs == part.get("attributes", 0)
+        assert name.decode("utf-16-le").rstrip("\x00") == part["label"]
+
+    # Unbenutzte Einträge bleiben leer
+    assert table[len(partitions) * GPT_ENTRY_SIZE:] == bytes(len(table) - len(partitions) * GPT_ENTRY_SIZE)
+
+
+def test_gpt_header_round_trip():
+    disk_guid = uuid.uuid4()
+    sector = gpt_header(1, 1000, 2, 34, 966, disk_guid, 0xDEADBEEF)
+    assert len(sector) == SECTOR_SIZE
+
+    fields = parse_header(sector)
+    assert fields[0] == b"EFI PART"
+    assert fields[2] == GPT_HEADER.size
+    assert fields[5:9] == [1, 1000, 34, 966]
+    assert uuid.UUID(bytes_le=fields[9]) == disk_guid
+    assert fields[10:] == [2, GPT_ENTRIES, GPT_ENTRY_SIZE, 0xDEADBEEF]
+
+
+def test_write_partition_table_gpt(tmp_path):
+    disk_size = 32 * MIB
+    last_lba = disk_size // SECTOR_SIZE - 1
+    image = tmp_path / "disk.img"
+    fd = os.open(image, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        os.ftruncate(fd, disk_size)
+        write_partition_table(fd, "gpt", make_partitions(), disk_size)
+    finally:
+        os.close(fd)
+    data = image.read_bytes()
+
+    # Protective MBR
+    assert data[510:512] == b"\x55\xAA"
+    assert data[446 + 4] == 0xEE
+    assert struct.unpack_from("<II", data, 446 + 8) == (1, last_lba)
+
+    primary = parse_header(data[SECTOR_SIZE:2 * SECTOR_SIZE])
+    backup = parse_header(data[last_lba * SECTOR_SIZE:])
+    assert (primary[5], primary[6]) == (1, last_lba)
+    assert (backup[5], backup[6]) == (last_lba, 1)
+    assert primary[9] == backup[9]
+
+    entries_size = GPT_ENTRIES * GPT_ENTRY_SIZE
+    for header in (primary, backup):
+        start = header[10] * SECTOR_SIZE
+        assert zlib.crc32(data[start:start + entries_size]) == header[13]
+    assert backup[10] == last_lba - GPT_ENTRY_SECTORS
@@ -0,0 +1,89 @@
+import os
+import hashlib
+import re
+
+from utils.sparse import (
+    BLOCK_SIZE, CHUNK_HEADER, CHUNK_TYPE_DONT_CARE, CHUNK_TYPE_FILL, CHUNK_TYPE_RAW,
+    SPARSE_HEADER, SPARSE_HEADER_MAGIC, copy_sparse, write_android_sparse, write_bmap,
+)
+
+
+def make_image(path, blocks=64):
+    """Sparse Testimage: Zufallsdaten, Füllmuster, Nullblock und Löcher"""
+    with open(path, "wb") as f:
+        f.truncate(blocks * BLOCK_SIZE)
+        f.seek(2 * BLOCK_SIZE)
+        f.write(os.urandom(3 * BLOCK_SIZE))
+        f.write(b"\xAB\xCD\xEF\x01" * (2 * BLOCK_SIZE // 4))
+        f.write(bytes(BLOCK_SIZE))
+        f.seek(40 * BLOCK_SIZE)
+        f.write(os.urandom(BLOCK_SIZE // 2))
+        f.seek((blocks - 1) * BLOCK_SIZE)
+        f.write(os.urandom(BLOCK_SIZE))
+
+
+def decode_android_sparse(data: bytes) -> bytes:
+    magic, major, _, hdr_sz, chunk_hdr_sz, blk_sz, total_blks, total_chunks, _ = SPARSE_HEADER.unpack_from(data)
+    assert magic == SPARSE_HEADER_MAGIC and major == 1
+    assert (hdr_sz, chunk_hdr_sz) == (SPARSE_HEADER.size, CHUNK_HEADER.size)
+
+    out = bytearray()
+    pos = hdr_sz
+    for _ in range(total_chunks):
+        typ, _, count, total = CHUNK_HEADER.unpack_from(data, pos)
+        body = data[pos + chunk_hdr_sz:pos + total]
+        if typ == CHUNK_TYPE_RAW:
+            assert len(body) == count * blk_sz
+            out += body
+        elif typ == CHUNK_TYPE_FILL:
+            assert len(body) == 4
+            out += body * (count * blk_sz // 4)
+        else:
+            assert typ == CHUNK_TYPE_DONT_CARE and not body
+            out += bytes(count * blk_sz)
+        pos += total
+    assert pos == len(data)
+    assert len(out) == total_blks * blk_sz
+    return bytes(out)
+
+
+def test_android_sparse_round_trip(tmp_path):
+    image = tmp_path / "disk.img"
+    make_image(image)
+    simg = write_android_sparse(image, tmp_path / "disk.simg")
+
+    data = simg.read_bytes()
+    assert decode_android_sparse(data) == image.read_bytes()
+    assert len(data) < image.stat().st_size
+
+
+def test_bmap_checksums(tmp_path):
+    image = tmp_path / "disk.img"
+    make_image(image)
+    text = write_bmap(image, tmp_path / "disk.bmap").read_text()
+    raw = image.read_bytes()
+
+    checksum = re.search(r"<BmapFileChecksum> (\w+) </BmapFileChecksum>", text).group(1)
+    assert hashlib.sha256(text.replace(checksum, "0" * 64).encode()).hexdigest() == checksum
+
+    ranges = re.findall(r'<Range chksum="(\w+)"> (\d+)(?:-(\d+))? </Range>', text)
+    assert ranges
+    for chksum, first, last in ranges:
+        first, last = int(first), int(last or first)
+        assert hashlib.sha256(raw[first * BLOCK_SIZE:(last + 1) * BLOCK_SIZE]).hexdigest() == chksum
+
+
+def test_copy_sparse_keeps_data_and_holes(tmp_path):
+    src = tmp_path / "src.img"
+    make_image(src)
+    dst = tmp_path / "dst.img"
+    offset = 4 * BLOCK_SIZE
+    fd = os.open(dst, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        os.ftruncate(fd, offset + src.stat().st_size)
+        copy_sparse(src, fd, offset)
+    finally:
+        os.close(fd)
+
+    assert dst.read_bytes()[offset:] == src.read_bytes()
+    assert dst.stat().st_blocks <= src.stat().st_blocks
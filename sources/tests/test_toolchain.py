@@ -0,0 +1,122 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import core.toolchain as toolchain
+from core.toolchain import expand_profile, probe_compiler, select_toolchain
+
+UNSUPPORTED = {"-mtune=cortex-a76", "-fno-asynchronous-unwind-tables"}
+
+TOOLCHAIN_CONFIG = {
+    "cache": "work/toolchains.json",
+    "probe_flags": {"common": ["-ffunction-sections"], "arm64": ["-march=armv8-a"]},
+    "profiles": {
+        "size": {"cflags": ["-Os", "-fno-asynchronous-unwind-tables"], "ldflags": ["-Wl,--gc-sections"]},
+        "speed": {"cflags": ["-O3", "-march={march}", "-mtune={mtune}"], "ldflags": []},
+        "lto": {"cflags": ["-Os", "-flto"], "ldflags": ["-flto"]},
+    },
+    "boards": {
+        "rpi4": {"arch": "arm64", "march": "armv8-a+crc", "mtune": "cortex-a72"},
+        "rpi5": {"arch": "arm64", "march": "armv8.2-a+crypto", "mtune": "cortex-a76"},
+    },
+}
+
+
+def write_tool(path, body=""):
+    path.write_text("#!/bin/sh\n" + body)
+    path.chmod(0o755)
+
+
+@pytest.fixture
+def fake_gcc(tmp_path, monkeypatch):
+    """Falscher Cross-Compiler 'fake-gcc' im PATH; Testkompilate werden nur gezählt"""
+    bindir = tmp_path / "bin"
+    bindir.mkdir()
+    write_tool(bindir / "fake-gcc", 'case "$1" in\n'
+               '  -dumpfullversion) echo 12.2.0 ;;\n'
+               '  -dumpmachine) echo aarch64-linux-gnu ;;\n'
+               'esac\n')
+    monkeypatch.setenv("PATH", str(bindir))
+
+    trials = []
+
+    def trial_compile(gcc, flag):
+        trials.append(flag)
+        return flag not in UNSUPPORTED
+
+    monkeypatch.setattr(toolchain, "trial_compile", trial_compile)
+    return SimpleNamespace(bindir=bindir, trials=trials)
+
+
+def run_select(tmp_path, monkeypatch, profile, board=None, cflags="-O2 -pipe"):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "configs").mkdir(exist_ok=True)
+    (tmp_path / "configs" / "toolchain.json").write_text(json.dumps(TOOLCHAIN_CONFIG))
+    args = SimpleNamespace(toolchain_config="toolchain.json", board=board, profile=profile)
+    cross_compile = {"arch": "arm64", "compiler_prefix": "fake-", "cflags": cflags, "ldflags": "-static"}
+    return select_toolchain("arm64", cross_compile, args)
+
+
+def test_expand_profile_drops_flags_without_board_value():
+    profile = TOOLCHAIN_CONFIG["profiles"]["speed"]
+    assert expand_profile(profile, {}) == (["-O3"], [])
+    assert expand_profile(profile, {"march": "armv8-a"}) == (["-O3", "-march=armv8-a"], [])
+    assert expand_profile(profile, TOOLCHAIN_CONFIG["boards"]["rpi4"]) == (
+        ["-O3", "-march=armv8-a+crc", "-mtune=cortex-a72"], [])
+
+
+def test_probe_compiler_cache_keyed_on_binary_hash(fake_gcc):
+    cache = {}
+    entry = probe_compiler("fake-gcc", ["-Os", "-mtune=cortex-a76"], cache)
+    assert list(cache) == [toolchain.file_hash(fake_gcc.bindir / "fake-gcc")]
+    assert entry["version"] == "12.2.0" and entry["target"] == "aarch64-linux-gnu"
+    assert entry["flags"] == {"-Os": True, "-mtune=cortex-a76": False}
+    assert fake_gcc.trials == ["-Os", "-mtune=cortex-a76"]
+
+    # Gleiche Flags: keine Testkompilate mehr; neue Flags werden einzeln nachgeprobt
+    fake_gcc.trials.clear()
+    assert probe_compiler("fake-gcc", ["-mtune=cortex-a76", "-Os"], cache) is entry
+    assert fake_gcc.trials == []
+    probe_compiler("fake-gcc", ["-Os", "-flto"], cache)
+    assert fake_gcc.trials == ["-flto"]
+
+    # Anderes Binary unter gleichem Namen: neuer Cache-Eintrag
+    write_tool(fake_gcc.bindir / "fake-gcc", "echo 13.1.0\n")
+    fake_gcc.trials.clear()
+    probe_compiler("fake-gcc", ["-Os"], cache)
+    assert len(cache) == 2
+    assert fake_gcc.trials == ["-Os"]
+
+
+def test_select_toolchain_profile_replaces_optimization_level(tmp_path, monkeypatch, fake_gcc):
+    result = run_select(tmp_path, monkeypatch, "speed", board="rpi4")
+    assert result["prefix"] == "fake-"
+    assert result["cflags"] == "-pipe -O3 -march=armv8-a+crc -mtune=cortex-a72"
+    assert result["ldflags"] == "-static"
+    assert (tmp_path / "work" / "toolchains.json").exists()
+
+    # Profil ohne -O behält die konfigurierte Stufe
+    result = run_select(tmp_path, monkeypatch, None)
+    assert result["cflags"] == "-O2 -pipe"
+
+
+def test_select_toolchain_drops_unsupported_flags(tmp_path, monkeypatch, fake_gcc):
+    result = run_select(tmp_path, monkeypatch, "speed", board="rpi5")
+    assert result["cflags"] == "-pipe -O3 -march=armv8.2-a+crypto"
+
+    result = run_select(tmp_path, monkeypatch, "size")
+    assert result["cflags"] == "-pipe -Os"
+    assert result["ldflags"] == "-static -Wl,--gc-sections"
+
+
+def test_select_toolchain_lto_wrappers(tmp_path, monkeypatch, fake_gcc):
+    write_tool(fake_gcc.bindir / "fake-gcc-ar")
+    write_tool(fake_gcc.bindir / "fake-gcc-nm")
+
+    result = run_select(tmp_path, monkeypatch, "lto")
+    assert "-flto" in result["cflags"].split()
+    assert result["make_args"] == ["AR=fake-gcc-ar", "NM=fake-gcc-nm"]
+
+    result = run_select(tmp_path, monkeypatch, "size")
+    assert result["make_args"] == []
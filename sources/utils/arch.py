@@ -0,0 +1,17 @@
+import platform
+
+# platform.machine() -> Build-Architektur
+NATIVE_ARCH = {
+    "x86_64": "x86_64",
+    "amd64": "x86_64",
+    "aarch64": "arm64",
+    "arm64": "arm64",
+    "armv7l": "arm",
+    "i686": "i386",
+    "i386": "i386",
+}
+
+
+def host_arch() -> str | None:
+    """Gibt die Architektur des Build-Hosts zurück (z.B. 'x86_64', 'arm64')"""
+    return NATIVE_ARCH.get(platform.machine().lower())
@@ -66,41 +66,105 @@ auto eth0
 iface eth0 inet dhcp
 """,
     "resolv.conf": "nameserver 8.8.8.8\n",
-    "init.d/rcS": """#!/bin/sh
-echo "[rcS] Mounting pseudo filesystems..."
+    "init.d/rcS": None,  # wird aus rcs_steps erzeugt, siehe render_boot_script()
+    "etc/profile": """# /etc/profile
+export PATH=/bin:/sbin:/usr/bin:/usr/sbin:/usr/local/bin:/usr/local/sbin
+PS1='\\u@\\h:\\w\\$ '
+"""
+}
+
+# -----------------------------
+# rcS und BusyBox init
+# -----------------------------
+# Jeder Schritt ist (Name, Shell-Code). Der Name dient als Messpunkt im
+# instrumentierten Boot-Modus (siehe core/bootprof.py).
+rcs_steps = [
+    ("mount_proc", """echo "[rcS] Mounting pseudo filesystems..."
 mount -t proc none /proc || echo "[rcS] Warning: /proc mount failed"
-mount -t sysfs none /sys || echo "[rcS] Warning: /sys mount failed"
-mount -t devtmpfs devtmpfs /dev || echo "[rcS] Warning: /dev mount failed"
-mount -t tmpfs tmpfs /tmp || echo "[rcS] Warning: /tmp mount failed"
-mount -t tmpfs tmpfs /run || echo "[rcS] Warning: /run mount failed"
+"""),
+    ("mount_sys", """mount -t sysfs none /sys || echo "[rcS] Warning: /sys mount failed"
+"""),
+    ("mount_dev", """mount -t devtmpfs devtmpfs /dev || echo "[rcS] Warning: /dev mount failed"
+"""),
+    ("mount_tmp", """mount -t tmpfs tmpfs /tmp || echo "[rcS] Warning: /tmp mount failed"
+"""),
+    ("mount_run", """mount -t tmpfs tmpfs /run || echo "[rcS] Warning: /run mount failed"
 mkdir -p /run/lock
 
-if [ -x /sbin/mdev ]; then
+"""),
+    ("mdev", """if [ -x /sbin/mdev ]; then
     echo "/sbin/mdev" > /proc/sys/kernel/hotplug 2>/dev/null
     /sbin/mdev -s
 fi
 
-ifconfig lo up
-echo "[rcS] Boot complete."
-exec /bin/sh
-""",
-    "etc/profile": """# /etc/profile
-export PATH=/bin:/sbin:/usr/bin:/usr/sbin:/usr/local/bin:/usr/local/sbin
-PS1='\\u@\\h:\\w\\$ '
+"""),
+    ("ifconfig_lo", """ifconfig lo up
+"""),
+    ("boot_complete", """echo "[rcS] Boot complete."
+"""),
+]
+
+init_steps = [
+    ("banner", """echo "Starting minimal BusyBox init..."
+"""),
+    ("mount_proc", """mount -t proc none /proc
+"""),
+    ("mount_sys", """mount -t sysfs none /sys
+"""),
+    ("rootfs_ready", """echo "Root filesystem ready."
+"""),
+]
+
+boot_script_tail = """exec /bin/sh
 """
-}
 
-# -----------------------------
-# BusyBox init
-# -----------------------------
-init_script_content = """#!/bin/sh
-echo "Starting minimal BusyBox init..."
-mount -t proc none /proc
-mount -t sysfs none /sys
-echo "Root filesystem ready."
-exec /bin/sh
+# Zeitstempel je Schritt werden im Speicher gesammelt und vor dem exec als
+# Ringlog (letzte BOOTPROF_RING Zeilen) nach /run/bootprof.log geschrieben.
+# Ist /run noch kein tmpfs (z.B. in /init), wird es vor dem Schreiben gemountet.
+# Format: <skript> <seq> <sekunden.nanosekunden> <schritt>
+bootprof_prologue = """# --- boot profiling (generiert) ---
+BOOTPROF_LOG=/run/bootprof.log
+BOOTPROF_RING=256
+_bp_seq=0
+_bp_buf=""
+_bp_mark() {
+    _bp_seq=$((_bp_seq + 1))
+    _bp_buf="${_bp_buf}$1 ${_bp_seq} $(date +%s.%N) $2
+"
+}
+_bp_flush() {
+    # /init mountet /run nicht selbst: ohne tmpfs würde das Log auf dem RootFS landen
+    if ! grep -qs " ${BOOTPROF_LOG%/*} tmpfs " /proc/mounts; then
+        mkdir -p "${BOOTPROF_LOG%/*}" 2>/dev/null
+        mount -t tmpfs tmpfs "${BOOTPROF_LOG%/*}"
+    fi
+    printf '%s' "$_bp_buf" >> "$BOOTPROF_LOG"
+    _bp_buf=""
+    if [ "$(wc -l < "$BOOTPROF_LOG")" -gt "$BOOTPROF_RING" ]; then
+        tail -n "$BOOTPROF_RING" "$BOOTPROF_LOG" > "$BOOTPROF_LOG.tmp" && mv "$BOOTPROF_LOG.tmp" "$BOOTPROF_LOG"
+    fi
+}
+# --- ende boot profiling ---
 """
 
+
+def render_boot_script(name: str, steps: list, instrument: bool = False) -> str:
+    """Baut ein Boot-Skript aus Schritten; instrument=True setzt vor jeden Schritt einen Zeitstempel"""
+    content = "#!/bin/sh\n"
+    if instrument:
+        content += bootprof_prologue
+    for step, code in steps:
+        if instrument:
+            content += f"_bp_mark {name} {step}\n"
+        content += code
+    if instrument:
+        content += f"_bp_mark {name} end\n_bp_flush\n"
+    return content + boot_script_tail
+
+
+etc_files["init.d/rcS"] = render_boot_script("rcS", rcs_steps)
+init_script_content = render_boot_script("init", init_steps)
+
 # -----------------------------
 # Funktionen
 # -----------------------------
@@ -127,11 +191,15 @@ def create_directories(extra_dir: str | None = None):
     print("[INFO] All directories created.")
 
 
-def create_etc_files():
-    """Erstellt alle minimalen /etc Konfig-Dateien"""
+def create_etc_files(instrument: bool = False):
+    """Erstellt alle minimalen /etc Konfig-Dateien; instrument=True erzeugt ein rcS mit Boot-Profiling"""
     etc_path = rootfs_dir / "etc"
     print("[INFO] Creating /etc configuration files...")
-    for filename, content in etc_files.items():
+    files = dict(etc_files)
+    if instrument:
+        files["init.d/rcS"] = render_boot_script("rcS", rcs_steps, instrument=True)
+        print("[INFO] Boot profiling enabled for rcS")
+    for filename, content in files.items():
         rel_path = filename.replace("etc/", "") if filename.startswith("etc/") else filename
         file_path = etc_path / rel_path
         file_path.parent.mkdir(parents=True, exist_ok=True)
@@ -173,10 +241,11 @@ def create_dev_nodes():
     print("[INFO] Created /dev/pts directory")
 
 
-def create_busybox_init():
-    """Erstellt init Skript für BusyBox"""
+def create_busybox_init(instrument: bool = False):
+    """Erstellt init Skript für BusyBox; instrument=True erzeugt ein init mit Boot-Profiling"""
     init_path = rootfs_dir / "init"
-    init_path.write_text(init_script_content)
+    content = render_boot_script("init", init_steps, instrument=True) if instrument else init_script_content
+    init_path.write_text(content)
     init_path.chmod(0o755)
     print(f"[INFO] Created BusyBox init script at {init_path}")
 
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# fat.py
+# Schreibt ein FAT32-Dateisystem aus einem Verzeichnis direkt in ein (Sparse-)Image
+
+import os
+import time
+import struct
+
+from pathlib import Path
+
+from utils.sparse import write_nonzero, COPY_CHUNK
+
+# -----------------------------
+# Konstanten
+# -----------------------------
+SECTOR_SIZE = 512
+RESERVED_SECTORS = 32
+NUM_FATS = 2
+ROOT_CLUSTER = 2
+MIN_CLUSTERS = 65525
+
+FAT_EOC = 0x0FFFFFFF
+ATTR_DIRECTORY = 0x10
+ATTR_ARCHIVE = 0x20
+ATTR_VOLUME_ID = 0x08
+ATTR_LFN = 0x0F
+
+BOOT_SECTOR = struct.Struct("<3s8sHBHBHHBHHHIIIHHIHH12sBBBI11s8s")
+DIR_ENTRY = struct.Struct("<11sBBBHHHHHHHI")
+LFN_ENTRY = struct.Struct("<B10sBBB12sH4s")
+
+SHORT_NAME_CHARS = set("ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789$%'-_@~`!(){}^#&")
+
+
+# -----------------------------
+# Hilfsfunktionen
+# -----------------------------
+
+def _sectors_per_cluster(total_sectors: int) -> int:
+    """Clustergröße nach der Microsoft FAT32 Tabelle"""
+    size = total_sectors * SECTOR_SIZE
+    if size <= 260 * 1024 * 1024:
+        return 1
+    if size <= 8 * 1024 ** 3:
+        return 8
+    if size <= 16 * 1024 ** 3:
+        return 16
+    if size <= 32 * 1024 ** 3:
+        return 32
+    return 64
+
+
+def _fat_datetime(mtime: float):
+    """Wandelt einen Unix-Zeitstempel in FAT (datum, zeit) um"""
+    t = time.localtime(max(mtime, 315532800))  # nicht vor 1980
+    year = min(max(t.tm_year, 1980), 2107)
+    date = ((year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+    clock = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+    return date, clock
+
+
+def _lfn_checksum(short_name: bytes) -> int:
+    checksum = 0
+    for c in short_name:
+        checksum = (((checksum & 1) << 7) + (checksum >> 1) + c) & 0xFF
+    return checksum
+
+
+def _exact_short_name(name: str) -> bytes | None:
+    """Gibt den 8.3 Namen zurück, falls name ohne LFN darstellbar ist"""
+    if name in (".", ".."):
+        return name.encode().ljust(11)
+    base, dot, ext = name.rpartition(".")
+    if not dot:
+        base, ext = name, ""
+    if not base or len(base) > 8 or len(ext) > 3 or "." in base:
+        return None
+    if not all(c in SHORT_NAME_CHARS for c in base + ext):
+        return None
+    return (base.ljust(8) + ext.ljust(3)).encode("ascii")
+
+
+def _generate_short_name(name: str, taken: set) -> bytes:
+    """Erzeugt einen eindeutigen 8.3 Alias im Stil BASIS~N.EXT"""
+    base, dot, ext = name.lstrip(".").rpartition(".")
+    if not dot:
+        base, ext = name.lstrip("."), ""
+
+    def clean(s):
+        return "".join(c if c in SHORT_NAME_CHARS else "_" for c in s.upper().replace(" ", ""))
+
+    base, ext = clean(base) or "_", clean(ext)[:3]
+    for n in range(1, 1000000):
+        tail = f"~{n}"
+        candidate = (base[:8 - len(tail)] + tail).ljust(8) + ext.ljust(3)
+        encoded = candidate.encode("ascii")
+        if encoded not in taken:
+            return encoded
+    raise ValueError(f"Kein freier 8.3 Name für {name}")
+
+
+def _lfn_entries(name: str, short_name: bytes) -> list[bytes]:
+    """Erzeugt die VFAT Long-File-Name Einträge (in Schreibreihenfolge)"""
+    units = name.encode("utf-16-le")
+    chars = [units[i:i + 2] for i in range(0, len(units), 2)]
+    if len(chars) > 255:
+        raise ValueError(f"Dateiname zu lang für FAT: {name}")
+    if len(chars) % 13:
+        chars.append(b"\x00\x00")
+    while len(chars) % 13:
+        chars.append(b"\xff\xff")
+
+    checksum = _lfn_checksum(short_name)
+    count = len(chars) // 13
+    entries = []
+    for index in range(count):
+        part = chars[index * 13:(index + 1) * 13]
+        order = index + 1
+        if order == count:
+            order |= 0x40
+        entries.append(LFN_ENTRY.pack(
+            order, b"".join(part[0:5]), ATTR_LFN, 0, checksum,
+            b"".join(part[5:11]), 0, b"".join(part[11:13])
+        ))
+    return list(reversed(entries))
+
+
+def _dir_entry(short_name: bytes, attr: int, cluster: int, size: int, mtime: float) -> bytes:
+    date, clock = _fat_datetime(mtime)
+    return DIR_ENTRY.pack(
+        short_name, attr, 0, 0, clock, date, date,
+        cluster >> 16, clock, date, cluster & 0xFFFF, size
+    )
+
+
+# -----------------------------
+# Layout
+# -----------------------------
+
+class _Node:
+    """Datei oder Verzeichnis im FAT Layout"""
+
+    def __init__(self, path: Path, name: str, is_dir: bool):
+        self.path = path
+        self.name = name
+        self.is_dir = is_dir
+        self.children: list["_Node"] = []
+        self.short_name = b""
+        self.size = 0 if is_dir else path.stat().st_size
+        self.mtime = path.stat().st_mtime
+        self.cluster = 0
+        self.clusters = 0
+        self.parent_cluster = 0
+
+
+def _scan(path: Path, name: str = "") -> _Node:
+    node = _Node(path, name, path.is_dir())
+    if node.is_dir:
+        taken = set()
+        for child in sorted(path.iterdir(), key=lambda p: p.name):
+            if not (child.is_dir() or child.is_file()):
+                print(f"[WARN] Überspringe {child} (weder Datei noch Verzeichnis)")
+                continue
+            sub = _scan(child, child.name)
+            short = _exact_short_name(child.name)
+            if short is None or short in taken:
+                short = _generate_short_name(child.name, taken)
+            sub.short_name = short
+            taken.add(short)
+            node.children.append(sub)
+    return node
+
+
+def _needs_lfn(node: _Node) -> bool:
+    return _exact_short_name(node.name) != node.short_name
+
+
+def _dir_bytes(node: _Node, is_root: bool) -> int:
+    entries = 1 if is_root else 2  # Volume-Label bzw. "." und ".."
+    for child in node.children:
+        entries += 1
+        if _needs_lfn(child):
+            entries += (len(child.name.encode("utf-16-le")) // 2 + 12) // 13
+    return entries * DIR_ENTRY.size
+
+
+def _assign_clusters(node: _Node, cluster_bytes: int, next_cluster: int, is_root: bool = False) -> int:
+    """Vergibt zusammenhängende Clusterbereiche in DFS-Reihenfolge"""
+    size = _dir_bytes(node, is_root) if node.is_dir else node.size
+    node.clusters = max(1, -(-size // cluster_bytes)) if (node.is_dir or size) else 0
+    if node.clusters:
+        node.cluster = next_cluster
+        next_cluster += node.clusters
+    for child in node.children:
+        next_cluster = _assign_clusters(child, cluster_bytes, next_cluster)
+    return next_cluster
+
+
+def _walk(node: _Node):
+    yield node
+    for child in node.children:
+        yield from _walk(child)
+
+
+# -----------------------------
+# Funktionen
+# -----------------------------
+
+def build_fat32(src_dir: Path, fd: int, offset: int, size: int, label: str = "BOOT", volume_id: int | None = None):
+    """
+    Schreibt ein FAT32-Dateisystem mit dem Inhalt von src_dir in fd ab Byte offset.
+    Es werden nur belegte Bereiche geschrieben, der Rest bleibt ein Loch (= Nullen = freie Cluster).
+
+    :param src_dir: Quellverzeichnis (z.B. work/build/bootfs)
+    :param fd: Dateideskriptor des Ziel-Images
+    :param offset: Startposition der Partition in Bytes
+    :param size: Partitionsgröße in Bytes
+    :param label: Volume Label (max. 11 Zeichen)
+    """
+    src_dir = Path(src_dir)
+    total_sectors = size // SECTOR_SIZE
+    spc = _sectors_per_cluster(total_sectors)
+    cluster_bytes = spc * SECTOR_SIZE
+
+    # FAT Größe nach Microsoft Spezifikation
+    fat_sectors = -(-(total_sectors - RESERVED_SECTORS) // ((256 * spc + NUM_FATS) // 2))
+    data_start = RESERVED_SECTORS + NUM_FATS * fat_sectors
+    cluster_count = (total_sectors - data_start) // spc
+    if cluster_count < MIN_CLUSTERS:
+        raise ValueError(
+            f"Boot-Partition zu klein für FAT32 ({size // (1024 * 1024)} MiB, {cluster_count} Cluster)"
+        )
+
+    root = _scan(src_dir)
+    used_end = _assign_clusters(root, cluster_bytes, ROOT_CLUSTER, is_root=True)
+    if used_end - ROOT_CLUSTER > cluster_count:
+        raise ValueError(f"Inhalt von {src_dir} passt nicht in die Boot-Partition")
+
+    def cluster_offset(cluster: int) -> int:
+        return offset + (data_start + (cluster - ROOT_CLUSTER) * spc) * SECTOR_SIZE
+
+    # Boot Sektor + FSInfo (+ Backups)
+    label_bytes = label.upper().encode("ascii", "replace")[:11].ljust(11)
+    if volume_id is None:
+        volume_id = int(time.time()) & 0xFFFFFFFF
+    boot = bytearray(SECTOR_SIZE)
+    boot[0:BOOT_SECTOR.size] = BOOT_SECTOR.pack(
+        b"\xEB\x58\x90", b"BLACKZOS", SECTOR_SIZE, spc, RESERVED_SECTORS, NUM_FATS,
+        0, 0, 0xF8, 0, 63, 255, offset // SECTOR_SIZE, total_sectors, fat_sectors,
+        0, 0, ROOT_CLUSTER, 1, 6, bytes(12), 0x80, 0, 0x29, volume_id,
+        label_bytes, b"FAT32   "
+    )
+    boot[510:512] = b"\x55\xAA"
+
+    free = cluster_count - (used_end - ROOT_CLUSTER)
+    fsinfo = bytearray(SECTOR_SIZE)
+    struct.pack_into("<I", fsinfo, 0, 0x41615252)
+    struct.pack_into("<III", fsinfo, 484, 0x61417272, free, used_end)
+    struct.pack_into("<I", fsinfo, 508, 0xAA550000)
+
+    for sector in (0, 6):
+        os.pwrite(fd, bytes(boot), offset + sector * SECTOR_SIZE)
+        os.pwrite(fd, bytes(fsinfo), offset + (sector + 1) * SECTOR_SIZE)
+
+    # FAT Tabellen: nur der belegte Anfang wird geschrieben
+    fat = [0x0FFFFFF8, FAT_EOC] + [0] * (used_end - ROOT_CLUSTER)
+    for node in _walk(root):
+        for i in range(node.clusters):
+            cluster = node.cluster + i
+            fat[cluster] = cluster + 1 if i < node.clusters - 1 else FAT_EOC
+    fat_bytes = struct.pack(f"<{len(fat)}I", *fat)
+    for n in range(NUM_FATS):
+        os.pwrite(fd, fat_bytes, offset + (RESERVED_SECTORS + n * fat_sectors) * SECTOR_SIZE)
+
+    # Verzeichnisse und Dateien
+    for node in _walk(root):
+        if node.is_dir:
+            entries = []
+            if node is root:
+                entries.append(_dir_entry(label_bytes, ATTR_VOLUME_ID, 0, 0, node.mtime))
+            else:
+                entries.append(_dir_entry(b".".ljust(11), ATTR_DIRECTORY, node.cluster, 0, node.mtime))
+                entries.append(_dir_entry(b"..".ljust(11), ATTR_DIRECTORY, node.parent_cluster, 0, node.mtime))
+            for child in node.children:
+                if child.is_dir:
+                    child.parent_cluster = 0 if node is root else node.cluster
+                if _needs_lfn(child):
+                    entries.extend(_lfn_entries(child.name, child.short_name))
+                attr = ATTR_DIRECTORY if child.is_dir else ATTR_ARCHIVE
+                entries.append(_dir_entry(child.short_name, attr, child.cluster, child.size, child.mtime))
+            os.pwrite(fd, b"".join(entries), cluster_offset(node.cluster))
+        elif node.clusters:
+            pos = 0
+            with open(node.path, "rb") as f:
+                while chunk := f.read(COPY_CHUNK):
+                    write_nonzero(fd, chunk, cluster_offset(node.cluster) + pos)
+                    pos += len(chunk)
+
+    print(f"[INFO] FAT32 '{label}' geschrieben: {used_end - ROOT_CLUSTER} von {cluster_count} Clustern belegt")
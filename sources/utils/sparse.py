@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# sparse.py
+# Sparse-Datei Hilfen: Daten-Extents, lochfreundliches Kopieren,
+# Android-Sparse- und bmap-Ausgabe
+
+import os
+import errno
+import struct
+import hashlib
+
+from pathlib import Path
+
+# -----------------------------
+# Konstanten
+# -----------------------------
+BLOCK_SIZE = 4096
+COPY_CHUNK = 1024 * 1024
+
+ZERO_BLOCK = bytes(BLOCK_SIZE)
+
+# Android sparse image Format (libsparse, sparse_format.h)
+SPARSE_HEADER_MAGIC = 0xED26FF3A
+SPARSE_HEADER = struct.Struct("<IHHHHIIII")
+CHUNK_HEADER = struct.Struct("<HHII")
+CHUNK_TYPE_RAW = 0xCAC1
+CHUNK_TYPE_FILL = 0xCAC2
+CHUNK_TYPE_DONT_CARE = 0xCAC3
+RAW_CHUNK_BLOCKS = 4096  # RAW Chunks auf 16 MiB begrenzen
+
+
+# -----------------------------
+# Funktionen
+# -----------------------------
+
+def data_extents(fd: int, size: int):
+    """Liefert (start, end) Bereiche mit Daten; Löcher werden via SEEK_DATA/SEEK_HOLE übersprungen"""
+    if not hasattr(os, "SEEK_DATA"):
+        if size:
+            yield 0, size
+        return
+
+    pos = 0
+    while pos < size:
+        try:
+            start = os.lseek(fd, pos, os.SEEK_DATA)
+        except OSError as e:
+            if e.errno == errno.ENXIO:
+                return
+            if e.errno in (errno.EINVAL, errno.EOPNOTSUPP):
+                # Dateisystem kennt kein SEEK_DATA -> alles als Daten behandeln
+                yield pos, size
+                return
+            raise
+        if start >= size:
+            return
+        end = min(os.lseek(fd, start, os.SEEK_HOLE), size)
+        yield start, end
+        pos = end
+
+
+def write_nonzero(fd: int, data: bytes, offset: int) -> int:
+    """Schreibt nur die Blöcke aus data, die nicht komplett aus Nullen bestehen"""
+    written = 0
+    view = memoryview(data)
+    run_start = None
+    for pos in range(0, len(data), BLOCK_SIZE):
+        block = view[pos:pos + BLOCK_SIZE]
+        if block == ZERO_BLOCK[:len(block)]:
+            if run_start is not None:
+                written += os.pwrite(fd, view[run_start:pos], offset + run_start)
+                run_start = None
+        elif run_start is None:
+            run_start = pos
+    if run_start is not None:
+        written += os.pwrite(fd, view[run_start:], offset + run_start)
+    return written
+
+
+def copy_sparse(src: Path, dst_fd: int, offset: int = 0) -> int:
+    """Kopiert src nach dst_fd ab offset, ohne Löcher zu lesen oder Null-Blöcke zu schreiben"""
+    written = 0
+    with open(src, "rb") as f:
+        fd = f.fileno()
+        size = os.fstat(fd).st_size
+        for start, end in data_extents(fd, size):
+            pos = start
+            while pos < end:
+                chunk = os.pread(fd, min(COPY_CHUNK, end - pos), pos)
+                if not chunk:
+                    break
+                written += write_nonzero(dst_fd, chunk, offset + pos)
+                pos += len(chunk)
+    return written
+
+
+def mapped_blocks(fd: int, size: int, block_size: int = BLOCK_SIZE):
+    """Liefert (erster, letzter) Blockbereiche (inklusive), die Daten enthalten"""
+    ranges = []
+    for start, end in data_extents(fd, size):
+        first = start // block_size
+        last = (end - 1) // block_size
+        if ranges and first <= ranges[-1][1] + 1:
+            ranges[-1] = (ranges[-1][0], max(ranges[-1][1], last))
+        else:
+            ranges.append((first, last))
+    return ranges
+
+
+def write_android_sparse(image: Path, dest: Path, block_size: int = BLOCK_SIZE) -> Path:
+    """Schreibt image als Android sparse image (RAW/FILL/DONT_CARE Chunks) nach dest"""
+    image = Path(image)
+    dest = Path(dest)
+
+    with open(image, "rb") as src, open(dest, "wb") as out:
+        fd = src.fileno()
+        size = os.fstat(fd).st_size
+        if size % block_size:
+            raise ValueError(f"Image-Größe {size} ist kein Vielfaches von {block_size}")
+        total_blocks = size // block_size
+
+        out.write(bytes(SPARSE_HEADER.size))
+        chunks = 0
+        current = None  # [typ, blöcke, payload-liste / fill-wert]
+
+        def flush():
+            nonlocal chunks, current
+            if current is None:
+                return
+            typ, count, payload = current
+            if typ == CHUNK_TYPE_RAW:
+                out.write(CHUNK_HEADER.pack(typ, 0, count, CHUNK_HEADER.size + count * block_size))
+                for block in payload:
+                    out.write(block)
+            elif typ == CHUNK_TYPE_FILL:
+                out.write(CHUNK_HEADER.pack(typ, 0, count, CHUNK_HEADER.size + 4))
+                out.write(payload)
+            else:
+                out.write(CHUNK_HEADER.pack(typ, 0, count, CHUNK_HEADER.size))
+            chunks += 1
+            current = None
+
+        def add(typ, block=None, fill=None):
+            nonlocal current
+            if current is not None and current[0] == typ:
+                if typ == CHUNK_TYPE_RAW and current[1] < RAW_CHUNK_BLOCKS:
+                    current[1] += 1
+                    current[2].append(block)
+                    return
+                if typ == CHUNK_TYPE_FILL and current[2] == fill:
+                    current[1] += 1
+                    return
+            flush()
+            if typ == CHUNK_TYPE_RAW:
+                current = [typ, 1, [block]]
+            else:
+                current = [typ, 1, fill]
+
+        next_block = 0
+        for first, last in mapped_blocks(fd, size, block_size):
+            if first > next_block:
+                flush()
+                current = [CHUNK_TYPE_DONT_CARE, first - next_block, None]
+                flush()
+            for index in range(first, last + 1):
+                block = os.pread(fd, block_size, index * block_size)
+                pattern = block[:4]
+                if block == pattern * (block_size // 4):
+                    add(CHUNK_TYPE_FILL, fill=pattern)
+                else:
+                    add(CHUNK_TYPE_RAW, block=block)
+            next_block = last + 1
+        flush()
+        if next_block < total_blocks:
+            current = [CHUNK_TYPE_DONT_CARE, total_blocks - next_block, None]
+            flush()
+
+        out.seek(0)
+        out.write(SPARSE_HEADER.pack(
+            SPARSE_HEADER_MAGIC, 1, 0, SPARSE_HEADER.size, CHUNK_HEADER.size,
+            block_size, total_blocks, chunks, 0
+        ))
+
+    print(f"[INFO] Android sparse image geschrieben: {dest} ({chunks} Chunks)")
+    return dest
+
+
+def write_bmap(image: Path, dest: Path, block_size: int = BLOCK_SIZE) -> Path:
+    """Schreibt eine bmaptool-kompatible Block-Map (Version 2.0, sha256) für image nach dest"""
+    image = Path(image)
+    dest = Path(dest)
+
+    with open(image, "rb") as src:
+        fd = src.fileno()
+        size = os.fstat(fd).st_size
+        ranges = []
+        mapped = 0
+        for first, last in mapped_blocks(fd, size, block_size):
+            digest = hashlib.sha256()
+            pos = first * block_size
+            end = min((last + 1) * block_size, size)
+            while pos < end:
+                chunk = os.pread(fd, min(COPY_CHUNK, end - pos), pos)
+                digest.update(chunk)
+                pos += len(chunk)
+            blocks = f"{first}-{last}" if last != first else f"{first}"
+            ranges.append(f'        <Range chksum="{digest.hexdigest()}"> {blocks} </Range>')
+            mapped += last - first + 1
+
+    blocks_count = (size + block_size - 1) // block_size
+    placeholder = "0" * 64
+    lines = [
+        '<?xml version="1.0" ?>',
+        '<bmap version="2.0">',
+        f"    <ImageSize> {size} </ImageSize>",
+        f"    <BlockSize> {block_size} </BlockSize>",
+        f"    <BlocksCount> {blocks_count} </BlocksCount>",
+        f"    <MappedBlocksCount> {mapped} </MappedBlocksCount>",
+        "    <ChecksumType> sha256 </ChecksumType>",
+        f"    <BmapFileChecksum> {placeholder} </BmapFileChecksum>",
+        "    <BlockMap>",
+        *ranges,
+        "    </BlockMap>",
+        "</bmap>",
+        "",
+    ]
+    text = "\n".join(lines)
+    checksum = hashlib.sha256(text.encode()).hexdigest()
+    dest.write_text(text.replace(placeholder, checksum, 1))
+
+    print(f"[INFO] Block-Map geschrieben: {dest} ({mapped}/{blocks_count} Blöcke belegt)")
+    return dest